@@ -0,0 +1,71 @@
+# analysis_app/_kernels.py
+"""
+Núcleo numérico de Colebrook-White (iteración de Praks-Brkić) y curva hL, en un solo lugar.
+Con Numba instalado las funciones se compilan; Numba es OPCIONAL: sin él, NUMBA_AVAILABLE es
+False y las mismas funciones corren como Python puro (escalares o arreglos de NumPy).
+"""
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Sustituto sin compilación cuando Numba no está disponible."""
+        def decorator(func):
+            return func
+        return decorator
+
+TWO_OVER_LN10 = 2.0 / math.log(10.0)
+
+
+@njit(cache=True)
+def colebrook_newton_step(x, A, B, y0, ln_y0):
+    """
+    Un paso de Newton sobre g(x) = x + (2/ln10) * ln(A + B*x), con x = 1/sqrt(f) y
+    ln(y) = ln(y0) + ln(1 + z), z = (y - y0)/y0, donde ln(1 + z) usa el aproximante de
+    Padé [3/3] (error < 1e-17 para |z| < 0.01). Sirve para escalares o arreglos; devuelve (x_nuevo, dx).
+    """
+    y = A + B * x
+    z = (y - y0) / y0
+    ln1p_z = z * (60.0 + z * (60.0 + 11.0 * z)) / (60.0 + z * (90.0 + z * (36.0 + 3.0 * z)))
+    dx = (x + TWO_OVER_LN10 * (ln_y0 + ln1p_z)) / (1.0 + TWO_OVER_LN10 * B / y)
+    return x - dx, dx
+
+
+@njit(cache=True)
+def colebrook_pade(Re, epsD):
+    """
+    Factor de fricción por la iteración de Praks-Brkić para Re > 0: semilla explícita
+    (Swamee-Jain), ÚNICO logaritmo de la forma implícita y pasos de Newton con Padé.
+    """
+    if Re < 2000.0:
+        return 64.0 / Re  # laminar
+
+    A = epsD / 3.7
+    B = 2.51 / Re
+    x = -2.0 * math.log10(A + 5.74 / Re ** 0.9)
+    y0 = A + B * x
+    ln_y0 = math.log(y0)
+
+    for _ in range(8):
+        x, dx = colebrook_newton_step(x, A, B, y0, ln_y0)
+        if abs(dx) <= 1e-13 * x:
+            break
+
+    return 1.0 / (x * x)
+
+
+@njit(cache=True)
+def hl_curve(V_arr, L, D, nu, sumK, g, epsD):
+    """Pérdida total hL para cada velocidad de V_arr (todas > 0) con D, nu y g positivos."""
+    out = np.empty_like(V_arr)
+    L_D = L / D
+    for i in range(V_arr.size):
+        V = V_arr[i]
+        f = colebrook_pade(V * D / nu, epsD)
+        out[i] = (f * L_D + sumK) * (V * V / (2.0 * g))
+    return out
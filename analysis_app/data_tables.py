@@ -1,5 +1,7 @@
 # analysis_app/data_tables.py (CÓDIGO COMPLETO FINAL Y CORREGIDO)
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Final, Mapping, Tuple
+import numpy as np
 
 # -------------------------------------------------------------
 # 1. TABLA ÚNICA DE DIÁMETROS INTERNOS (D) EN METROS [m]
@@ -32,6 +34,21 @@ PIPE_DIAMETERS_M: Dict[tuple, float] = {
     (24, 40): 0.575,      # 24"
 }
 
+# Índice por cédula y nominal entero en milésimas de pulgada (0.125" -> 125):
+# evita hashear tuplas con flotantes en cada búsqueda. Solo coincide el nominal exacto.
+_PIPE_BY_SCHED: Dict[int, Dict[int, float]] = {}
+for (_nominal, _schedule), _diameter_m in PIPE_DIAMETERS_M.items():
+    _PIPE_BY_SCHED.setdefault(_schedule, {})[int(round(_nominal * 1000))] = _diameter_m
+del _nominal, _schedule, _diameter_m
+
+# Misma tabla como arreglos paralelos (SoA): clave compuesta schedule * _PIPE_KEY_SCALE +
+# nominal_milésimas (ordenada) y diámetro alineado, para búsquedas vectorizadas con searchsorted.
+_PIPE_KEY_SCALE: Final = 1_000_000
+_pipe_rows = sorted((sch * _PIPE_KEY_SCALE + int(round(nom * 1000)), d) for (nom, sch), d in PIPE_DIAMETERS_M.items())
+_PIPE_KEYS: np.ndarray = np.array([r[0] for r in _pipe_rows], dtype=np.int64)
+_PIPE_D_M: np.ndarray = np.array([r[1] for r in _pipe_rows], dtype=float)
+del _pipe_rows
+
 # -------------------------------------------------------------
 # 2. RUGOSIDADES (ε) EN METROS (Claves en MINÚSCULAS)
 # -------------------------------------------------------------
@@ -51,6 +68,11 @@ ROUGHNESS: Dict[str, float] = {
     "madera": 5.4e-4,
     "hormigón": 1.65e-3, # Dejamos la tilde en el valor si está en el Forms
 }
+_ROUGHNESS_FALLBACK: Final = ROUGHNESS["acero comercial y soldado"]
+
+# Versión indexada por posición (enum de materiales) para búsquedas por lote
+ROUGHNESS_MATERIALS: Tuple[str, ...] = tuple(ROUGHNESS)
+_ROUGHNESS_ARR: np.ndarray = np.fromiter(ROUGHNESS.values(), dtype=float, count=len(ROUGHNESS))
 
 # -------------------------------------------------------------
 # 3. COEFICIENTES DE PÉRDIDA MENOR (K) (Claves en MINÚSCULAS)
@@ -87,10 +109,21 @@ MINOR_LOSS_COEFFICIENTS: Dict[str, float] = {
     "Válvula de Mariposa Abierta": 0.24,
 }
 
+# Vistas precalculadas al importar (la tabla es estática)
+_MINOR_LOSS_LC: Dict[str, float] = {k.lower(): v for k, v in MINOR_LOSS_COEFFICIENTS.items()}
+_ACCESSORIES_TITLECASE: Mapping[str, float] = MappingProxyType(
+    {k.title(): v for k, v in MINOR_LOSS_COEFFICIENTS.items()}
+)
+
+# Estructura de arreglos (SoA): nombres en minúsculas + vector de K alineado (para lotes)
+MINOR_LOSS_NAMES: Tuple[str, ...] = tuple(_MINOR_LOSS_LC)
+_K_VALUES: np.ndarray = np.fromiter(_MINOR_LOSS_LC.values(), dtype=float, count=len(_MINOR_LOSS_LC))
+
 # -------------------------------------------------------------
 # 4. CONSTANTES Y FUNCIONES DE BÚSQUEDA
 # -------------------------------------------------------------
-CONVERSION_M_TO_FT = 3.28084 # Factor de conversión: 1 metro = 3.28084 pies
+CONVERSION_M_TO_FT: Final = 3.28084  # Factor de conversión: 1 metro = 3.28084 pies
+CONVERSION_FT_TO_M: Final = 1.0 / CONVERSION_M_TO_FT
 
 
 def get_pipe_diameter(nominal: float, schedule: int, system: str) -> float:
@@ -98,10 +131,12 @@ def get_pipe_diameter(nominal: float, schedule: int, system: str) -> float:
     Busca el diámetro interno D en la unidad correspondiente (m o ft).
     Aplica la conversión de metros a pies si el sistema es Inglés.
     """
-    key = (nominal, schedule)
-    
     # 1. Buscar el diámetro en METROS (D_m)
-    diameter_m = PIPE_DIAMETERS_M.get(key)
+    # (solo si nominal * 1000 es entero: 0.1254 NO debe confundirse con 1/8")
+    nominal_mil = nominal * 1000
+    diameter_m = None
+    if nominal_mil == int(nominal_mil):
+        diameter_m = _PIPE_BY_SCHED.get(schedule, {}).get(int(nominal_mil))
     
     # 2. Si no está en tabla (ej. el usuario ingresó 0.06 o 0.25), usa el valor nominal directamente.
     if diameter_m is None:
@@ -111,7 +146,7 @@ def get_pipe_diameter(nominal: float, schedule: int, system: str) -> float:
             diameter_m = nominal
         else:
             # Si el usuario ingresó 0.5 pies, convertimos 0.5 ft a metros:
-            diameter_m = nominal / CONVERSION_M_TO_FT 
+            diameter_m = nominal * CONVERSION_FT_TO_M
     
     # 3. Aplicar conversión final: Este es el paso crucial
     if system == 'SI':
@@ -123,8 +158,10 @@ def get_pipe_diameter(nominal: float, schedule: int, system: str) -> float:
 
 def get_roughness_by_material(material: str, system: str) -> float:
     """Devuelve la rugosidad e del material en la unidad correspondiente (m o ft)."""
-    material_lower = material.lower().strip()
-    epsilon_m = ROUGHNESS.get(material_lower, ROUGHNESS["acero comercial y soldado"])
+    # Las claves de ROUGHNESS ya están en minúsculas: se normaliza solo si falla la búsqueda directa
+    epsilon_m = ROUGHNESS.get(material)
+    if epsilon_m is None:
+        epsilon_m = ROUGHNESS.get(material.lower().strip(), _ROUGHNESS_FALLBACK)
     
     if system == 'SI':
         return epsilon_m
@@ -132,11 +169,71 @@ def get_roughness_by_material(material: str, system: str) -> float:
         return epsilon_m * CONVERSION_M_TO_FT
 
 
+def get_pipe_diameter_batch(nominals, schedules, system: str) -> np.ndarray:
+    """
+    Versión vectorizada de get_pipe_diameter para arreglos de nominales y cédulas.
+    Los pares que no están en tabla usan el nominal como D en la unidad base, igual que la versión escalar.
+    """
+    nominals, schedules = np.broadcast_arrays(np.asarray(nominals, dtype=float),
+                                              np.asarray(schedules, dtype=np.int64))
+    nominals_mil = nominals * 1000
+    keys = schedules * _PIPE_KEY_SCALE + nominals_mil.astype(np.int64)
+    pos = np.minimum(np.searchsorted(_PIPE_KEYS, keys), _PIPE_KEYS.size - 1)
+    found = (_PIPE_KEYS[pos] == keys) & (nominals_mil == np.floor(nominals_mil))
+
+    if system == 'SI':
+        return np.where(found, _PIPE_D_M[pos], nominals)
+    else:
+        return np.where(found, _PIPE_D_M[pos] * CONVERSION_M_TO_FT, nominals)
+
+
+def get_roughness_by_material_batch(mat_indices, system: str) -> np.ndarray:
+    """
+    Rugosidades (m o ft) para índices de material según el orden de ROUGHNESS_MATERIALS.
+    Lanza ValueError si algún índice está fuera de rango (los negativos no se aceptan).
+    """
+    mat_indices = np.asarray(mat_indices, dtype=np.intp)
+    if mat_indices.size and (mat_indices.min() < 0 or mat_indices.max() >= _ROUGHNESS_ARR.size):
+        raise ValueError("Índice de material fuera de rango.")
+    epsilon_m = _ROUGHNESS_ARR[mat_indices]
+
+    if system == 'SI':
+        return epsilon_m
+    else:
+        return epsilon_m * CONVERSION_M_TO_FT
+
+
 def get_minor_loss_k(componente: str) -> float:
     """Devuelve el coeficiente K de un accesorio (0.0 si no existe)."""
-    return MINOR_LOSS_COEFFICIENTS.get(componente.lower().strip(), 0.0)
+    k = _MINOR_LOSS_LC.get(componente)
+    if k is None:
+        # Solo se normaliza si la clave no llegó ya en minúsculas
+        k = _MINOR_LOSS_LC.get(componente.lower().strip(), 0.0)
+    return k
+
 
+def get_accessories_dict() -> Mapping[str, float]:
+    """Devuelve el diccionario {Nombre: K_valor} (solo lectura) para llenar el selector HTML."""
+    return _ACCESSORIES_TITLECASE
 
-def get_accessories_dict():
-    """Devuelve el diccionario {Nombre: K_valor} para llenar el selector HTML."""
-    return {k.title(): v for k, v in MINOR_LOSS_COEFFICIENTS.items()}
\ No newline at end of file
+
+def sum_minor_loss_k(accessories: Mapping[str, float]) -> float:
+    """
+    Devuelve la suma de K ponderada por cantidad para {accesorio: cantidad}.
+    Las claves deben venir en minúsculas (la vista las normaliza al parsear el JSON);
+    los accesorios desconocidos aportan 0.
+    """
+    k_get = _MINOR_LOSS_LC.get
+    return sum((k_get(name, 0.0) * count for name, count in accessories.items()), 0.0)
+
+
+def sum_minor_loss_k_batch(counts) -> np.ndarray:
+    """
+    Suma de K para muchas configuraciones a la vez: counts tiene forma (..., len(MINOR_LOSS_NAMES))
+    con las cantidades de cada accesorio en el orden de MINOR_LOSS_NAMES.
+    Lanza ValueError si la última dimensión no coincide con el número de accesorios.
+    """
+    counts = np.asarray(counts, dtype=float)
+    if counts.ndim == 0 or counts.shape[-1] != _K_VALUES.size:
+        raise ValueError(f"counts debe tener {_K_VALUES.size} columnas (una por accesorio de MINOR_LOSS_NAMES).")
+    return counts @ _K_VALUES
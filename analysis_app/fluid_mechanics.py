@@ -1,11 +1,22 @@
 # fluid_mechanics.py (CÓDIGO COMPLETO CORREGIDO)
+import math
 import warnings
+from typing import Final, Tuple
 import numpy as np
-from scipy.optimize import root_scalar
+
+from ._kernels import NUMBA_AVAILABLE, colebrook_newton_step, colebrook_pade, hl_curve
 
 # Constantes de Gravedad
-G_SI = 9.81    # m/s^2
-G_INGLES = 32.2  # ft/s^2
+G_SI: Final = 9.81    # m/s^2
+G_INGLES: Final = 32.2  # ft/s^2
+
+# Límites de iteración de solve_velocity
+_MAX_BRACKET_DOUBLINGS: Final = 10
+_MAX_BISECTIONS: Final = 60
+
+# (g, g_unit, L_unit, Q_unit, P_unit, rho_unit, nu_unit, W_unit) por sistema, construidas una sola vez
+_CONSTS_SI: Final[Tuple] = (G_SI, 'm/s²', 'm', 'm³/s', 'Pa', 'kg/m³', 'm²/s', 'W')
+_CONSTS_IMP: Final[Tuple] = (G_INGLES, 'ft/s²', 'ft', 'ft³/s', 'lbf/ft²', 'slug/ft³', 'ft²/s', 'hp')
 
 # --- UTILERÍAS DE UNIDADES Y FÍSICA BÁSICA ---
 
@@ -13,10 +24,9 @@ G_INGLES = 32.2  # ft/s^2
 def get_constants(system: str):
     """Devuelve (g, g_unit, L_unit, Q_unit, P_unit, rho_unit, nu_unit, power_unit)."""
     if system == 'SI':
-        # g, g_unit, L_unit, Q_unit, P_unit, rho_unit, nu_unit, W_unit
-        return G_SI, 'm/s²', 'm', 'm³/s', 'Pa', 'kg/m³', 'm²/s', 'W'
+        return _CONSTS_SI
     else:
-        return G_INGLES, 'ft/s²', 'ft', 'ft³/s', 'lbf/ft²', 'slug/ft³', 'ft²/s', 'hp'
+        return _CONSTS_IMP
 
 
 def kinematic_viscosity(mu: float, rho: float) -> float:
@@ -39,64 +49,20 @@ def reynolds_number(V: float, D: float, nu: float) -> float:
 def colebrook_white_friction_factor(Re: float, epsilon_D: float) -> float:
     """
     Resuelve el factor de fricción 'f' mediante la ecuación de Colebrook-White.
-    Se usan múltiples estrategias (brentq, secant, newton). Retorna f>0.
+    Iteración de Praks-Brkić con una sola llamada a logaritmo: se evalúa ln() una vez
+    en la semilla explícita (Swamee-Jain) y las iteraciones de Newton usan un
+    aproximante de Padé de ln(1 + z). Converge a precisión doble en 2-4 pasos.
+    La iteración vive en _kernels.colebrook_pade.
     - Re: Reynolds
     - epsilon_D: rugosidad relativa (epsilon / D)
     """
-    # Casos simples
+    # Casos simples (sin warnings: esta función se llama dentro de los bucles del solver)
     if Re <= 0:
-        warnings.warn("Re <= 0 en colebrook_white_friction_factor; devolviendo 0.0")
         return 0.0
     if Re < 2000:
         return 64.0 / Re  # laminar
 
-    def colebrook_equation(f):
-        # evitamos sqrt de números <= 0
-        if f <= 0:
-            return 1e6
-        return 1.0 / np.sqrt(f) + 2.0 * np.log10((epsilon_D / 3.7) + (2.51 / (Re * np.sqrt(f))))
-
-    # Estimación empírica inicial (explicit approx)
-    try:
-        f_guess = 0.25 / (np.log10((epsilon_D / 3.7) + (5.74 / (Re ** 0.9)))) ** 2
-    except Exception:
-        f_guess = 0.02  # fallback razonable
-
-    # Intentos de resolución (ordenados por robustez)
-    # 1) brentq en un intervalo amplio si existe cambio de signo
-    bracket_low, bracket_high = 1e-6, 0.1
-    try:
-        fl = colebrook_equation(bracket_low)
-        fh = colebrook_equation(bracket_high)
-        if np.sign(fl) != np.sign(fh):
-            sol = root_scalar(colebrook_equation, bracket=[bracket_low, bracket_high], method='brentq', maxiter=200)
-            if sol.converged and sol.root > 0:
-                return float(sol.root)
-    except Exception:
-        # no interrumpimos; intentaremos otros métodos
-        pass
-
-    # 2) secant cerca de f_guess
-    try:
-        x0 = max(1e-6, f_guess * 0.8)
-        x1 = min(0.5, f_guess * 1.2)
-        sol = root_scalar(colebrook_equation, x0=x0, x1=x1, method='secant', maxiter=200)
-        if sol.converged and sol.root > 0:
-            return float(sol.root)
-    except Exception:
-        pass
-
-    # 3) newton (requiere buena aproximación inicial)
-    try:
-        sol = root_scalar(colebrook_equation, x0=f_guess, method='newton', maxiter=200)
-        if sol.converged and sol.root > 0:
-            return float(sol.root)
-    except Exception:
-        pass
-
-    # 4) fallback: usar aproximación explícita (f_guess)
-    warnings.warn("Colebrook no convergió; usando aproximación explícita f_guess.")
-    return float(f_guess)
+    return colebrook_pade(Re, epsilon_D)
 
 
 def total_head_loss(f: float, L: float, D: float, V: float, sum_K: float, g: float) -> float:
@@ -107,10 +73,8 @@ def total_head_loss(f: float, L: float, D: float, V: float, sum_K: float, g: flo
     """
     if D <= 0 or g <= 0:
         return 0.0
-    velocity_head = (V ** 2) / (2 * g)
-    Hf = f * (L / D) * velocity_head
-    Hm = sum_K * velocity_head
-    return Hf + Hm
+    # (Hf + Hm) = (f*L/D + sum_K) * V^2/2g en una sola expresión
+    return (f * L / D + sum_K) * (0.5 * V * V / g)
 
 
 def pressure_drop(rho: float, g: float, hL: float) -> float:
@@ -143,116 +107,170 @@ def pumping_power(Q: float, delta_P: float, system: str, efficiency: float = 1.0
         return (power_brute / 550.0) / efficiency
 
 
-# --- DESPEJE DE VELOCIDAD (Para resolver V/Q) ---
-
-
-def energy_equation_for_V(V: float, P1: float, P2: float, z1: float, z2: float,
-                          L: float, D: float, rho: float, nu: float, sum_K: float, g: float,
-                          material_epsilon: float) -> float:
+def full_hydraulics(V: float, D: float, nu: float, epsilon_D: float, L: float, sum_K: float,
+                    g: float, rho: float, Q: float, system: str, efficiency: float = 1.0) -> dict:
     """
-    Ecuación de energía (balance) puesta en forma F(V) = 0 para despejar V.
-    Retorna hL - ( (P1-P2)/(rho*g) + (z1 - z2) ) donde hL depende de V.
-    material_epsilon: rugosidad absoluta (m o ft) - se convertirá a epsilon/D internamente.
+    Cálculo fusionado de Re, f, hL, Delta P y potencia para una V conocida.
+    Equivale a encadenar reynolds_number, colebrook_white_friction_factor, total_head_loss,
+    pressure_drop y pumping_power, pero sin esas llamadas intermedias: las fórmulas van en
+    línea y f sale directamente del núcleo colebrook_pade.
+    epsilon_D: rugosidad relativa (epsilon / D).
+    Devuelve {'Re', 'f', 'hL', 'delta_P', 'power'}.
     """
-    if V <= 0:
-        # devolver un valor grande para indicar que V no puede ser <= 0
-        return 1e10
+    if efficiency <= 0:
+        raise ValueError("La eficiencia debe ser positiva y mayor que 0.")
 
-    Re = reynolds_number(V, D, nu)
-    if D == 0:
-        return 1e10
+    if V <= 0 or D <= 0 or nu <= 0:
+        Re = 0.0
+        f = 0.0
+    else:
+        Re = V * D / nu
+        f = colebrook_pade(Re, epsilon_D)  # Re > 0: laminar o turbulento
 
-    epsilon_D = material_epsilon / D if material_epsilon is not None else 0.0
-    f = colebrook_white_friction_factor(Re, epsilon_D)
-    hL = total_head_loss(f, L, D, V, sum_K, g)
+    if D <= 0 or g <= 0:
+        hL = 0.0
+    else:
+        velocity_head = 0.5 * V * V / g
+        hL = (f * L / D + sum_K) * velocity_head
 
-    # carga disponible en unidades de longitud
-    delta_z_p = (P1 - P2) / (rho * g) + (z1 - z2)
-    return hL - delta_z_p
+    delta_P = rho * g * hL
+    power = Q * delta_P / efficiency
+    if system != 'SI':
+        power /= 550.0  # ft*lbf/s -> hp
+
+    return {'Re': Re, 'f': f, 'hL': hL, 'delta_P': delta_P, 'power': power}
+
+
+# --- DESPEJE DE VELOCIDAD (Para resolver V/Q) ---
 
 
 def solve_velocity(P1: float, P2: float, z1: float, z2: float,
                    L: float, D: float, rho: float, nu: float, sum_K: float, g: float,
-                   material_epsilon: float, V_min: float = 1e-3, V_max: float = 20.0):
+                   epsilon_D: float, V_min: float = 1e-3, V_max: float = 20.0):
     """
-    Resuelve la velocidad V y el caudal Q (V * Area) intentando varias estrategias.
-    Devuelve (V, Q) o (None, None) si no converge.
-    - V_min, V_max: límites para el intento con brentq.
+    Resuelve la velocidad V y el caudal Q (V * Area) por bisección: F(V) = hL(V) - carga
+    disponible es monótona creciente en V, así que basta acotar el cambio de signo.
+    Devuelve (V, Q, f, Re, hL) o (None, None, None, None, None) si no hay solución;
+    f, Re y hL corresponden a la V resuelta, así el llamador no repite el cálculo.
+    - epsilon_D: rugosidad relativa (epsilon / D).
+    - V_min, V_max: intervalo inicial; V_max se duplica si la energía disponible aún supera a hL.
     """
-    Area = np.pi * (D ** 2) / 4.0
+    Area = math.pi * D * D * 0.25
+
+    # Términos que no dependen de V: se calculan una sola vez
+    delta_z_p = (P1 - P2) / (rho * g) + (z1 - z2)  # carga disponible
+    last = None  # (V, Re, f, hL) de la última evaluación de F
 
-    # Functor parcial para root_scalar (solo V como variable)
+    # Alias locales: F se evalúa decenas de veces y así evita búsquedas en el espacio global
+    reynolds = reynolds_number
+    colebrook = colebrook_white_friction_factor
+    head_loss = total_head_loss
+
+    # Ecuación de energía F(V) = hL(V) - carga disponible, guardando el estado de la última evaluación
     def F(V):
-        return energy_equation_for_V(V, P1, P2, z1, z2, L, D, rho, nu, sum_K, g, material_epsilon)
-
-    # 1) Intentar brentq si hay cambio de signo en [V_min, V_max]
-    try:
-        f_low = F(V_min)
-        f_high = F(V_max)
-        if np.sign(f_low) != np.sign(f_high):
-            sol = root_scalar(F, bracket=[V_min, V_max], method='brentq', maxiter=200)
-            if sol.converged and sol.root > 0:
-                V = sol.root
-                return V, V * Area
-    except Exception:
-        pass
-
-    # 2) Intentar secant/newton con guesses alrededor de una estimación
-    try:
-        # Estimación rudimentaria: asumir que hL ~ delta_z_p => V_est = sqrt(2*g*delta_z_p) (si delta_z_p>0)
-        try:
-            delta_z_p = (P1 - P2) / (rho * g) + (z1 - z2)
-            if delta_z_p > 0:
-                V_est = np.sqrt(2 * g * delta_z_p)
-            else:
-                V_est = (V_min + V_max) / 2.0
-        except Exception:
-            V_est = (V_min + V_max) / 2.0
-
-        x0 = max(V_min, V_est * 0.5)
-        x1 = min(V_max, V_est * 1.5)
-        sol = root_scalar(F, x0=x0, x1=x1, method='secant', maxiter=200)
-        if sol.converged and sol.root > 0:
-            V = sol.root
-            return V, V * Area
-    except Exception:
-        pass
-
-    # 3) Intentar newton con una sola semilla
-    try:
-        sol = root_scalar(F, x0=(V_min + V_max) / 2.0, method='newton', maxiter=200)
-        if sol.converged and sol.root > 0:
-            V = sol.root
-            return V, V * Area
-    except Exception:
-        pass
-
-    warnings.warn("No se pudo resolver la velocidad con las estrategias disponibles.")
-    return None, None
+        nonlocal last
+        if V <= 0 or D == 0:
+            return 1e10
+        Re = reynolds(V, D, nu)
+        f = colebrook(Re, epsilon_D)
+        hL = head_loss(f, L, D, V, sum_K, g)
+        last = (V, Re, f, hL)
+        return hL - delta_z_p
+
+    def solved(V):
+        if last is None or last[0] != V:
+            F(V)
+        _, Re, f, hL = last
+        return V, V * Area, f, Re, hL
+
+    lo, hi = V_min, V_max
+    f_lo = F(lo)
+    if f_lo == 0:
+        return solved(lo)
+    f_hi = F(hi)
+
+    # Si a V_max aún sobra energía (F < 0), se amplía el intervalo hacia arriba
+    for _ in range(_MAX_BRACKET_DOUBLINGS):
+        if f_hi >= 0:
+            break
+        lo, f_lo = hi, f_hi
+        hi *= 2.0
+        f_hi = F(hi)
+
+    if f_hi == 0:
+        return solved(hi)
+    if (f_lo > 0) == (f_hi > 0):
+        warnings.warn("No se pudo resolver la velocidad: no hay cambio de signo en el intervalo.")
+        return None, None, None, None, None
+
+    for _ in range(_MAX_BISECTIONS):
+        mid = 0.5 * (lo + hi)
+        f_mid = F(mid)
+        if (f_mid > 0) == (f_lo > 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+        if hi - lo < 1e-9 * max(1.0, hi):
+            break
+
+    return solved(0.5 * (lo + hi))
 
 
 # --- GENERADOR DE DATOS PARA GRÁFICA ---
 
 
+def _colebrook_friction_factor_array(Re: np.ndarray, epsilon_D: float) -> np.ndarray:
+    """
+    Versión vectorizada de colebrook_white_friction_factor para un arreglo de Re > 0.
+    Misma iteración de Praks-Brkić (un logaritmo + Newton con Padé) aplicada a todo el arreglo.
+    """
+    f = 64.0 / Re  # laminar
+    turbulent = Re >= 2000
+    if not turbulent.any():
+        return f
+    Re = Re[turbulent]
+
+    # Misma iteración que _kernels.colebrook_pade, con la semilla y el logaritmo en NumPy
+    A = epsilon_D / 3.7
+    B = 2.51 / Re
+    x = -2.0 * np.log10(A + 5.74 / Re ** 0.9)
+    y0 = A + B * x
+    ln_y0 = np.log(y0)
+
+    for _ in range(8):
+        x, dx = colebrook_newton_step(x, A, B, y0, ln_y0)
+        if np.all(np.abs(dx) <= 1e-13 * x):
+            break
+
+    f[turbulent] = 1.0 / (x * x)
+    return f
+
+
 def generate_hl_vs_v_data(V_min: float, V_max: float, steps: int,
                           L: float, D: float, nu: float, sum_K: float, g: float,
-                          material_epsilon: float):
+                          epsilon_D: float):
     """
     Genera lista de tuplas (V, hL) para graficar la pérdida total en función de la velocidad.
+    epsilon_D: rugosidad relativa (epsilon / D).
+    Se evalúa sobre toda la malla de velocidades con operaciones de arreglo (sin bucle por punto);
+    si Numba está instalado se usa el núcleo compilado de _kernels.
     """
     if steps <= 0:
         raise ValueError("steps debe ser un entero positivo.")
 
     V_values = np.linspace(V_min, V_max, steps)
-    data = []
-
-    for V in V_values:
-        if V <= 0:
-            continue
-        Re = reynolds_number(V, D, nu)
-        epsilon_D = material_epsilon / D if D != 0 else 0.0
-        f = colebrook_white_friction_factor(Re, epsilon_D)
-        hL = total_head_loss(f, L, D, V, sum_K, g)
-        data.append((V, hL))
-
-    return data
+    V_values = V_values[V_values > 0]
+
+    if D <= 0 or g <= 0:
+        hL = np.zeros_like(V_values)
+    elif nu <= 0:
+        # Sin Re válido f = 0 (como en full_hydraulics): solo quedan las pérdidas menores
+        hL = sum_K * (V_values * V_values / (2 * g))
+    elif NUMBA_AVAILABLE:
+        hL = hl_curve(V_values, L, D, nu, sum_K, g, epsilon_D)
+    else:
+        Re = V_values * D / nu
+        f = _colebrook_friction_factor_array(Re, epsilon_D)
+        hL = (f * (L / D) + sum_K) * (V_values * V_values / (2 * g))
+
+    return list(zip(V_values.tolist(), hL.tolist()))
@@ -1,8 +1,8 @@
 from django import forms
 from .data_tables import ROUGHNESS
 
-# Generar opciones de rugosidad
-ROUGHNESS_CHOICES = [(k, k.replace('_', ' ').title()) for k in ROUGHNESS.keys()]
+# Generar opciones de rugosidad (una sola vez, inmutables y compartidas por todas las instancias)
+ROUGHNESS_CHOICES = tuple((k, k.title()) for k in ROUGHNESS)
 
 
 class FluidInputForm(forms.Form):
@@ -92,29 +92,44 @@ class FluidInputForm(forms.Form):
     )
 
     # 6. PARÁMETROS DE LA ECUACIÓN DE ENERGÍA
-    P1 = forms.FloatField(label='Presión 1 (P₁)', required=False)
-    P2 = forms.FloatField(label='Presión 2 (P₂)', required=False)
-    z1 = forms.FloatField(label='Altura 1 (z₁)', required=False)
-    z2 = forms.FloatField(label='Altura 2 (z₂)', required=False)
+    P1 = forms.FloatField(label='Presión 1 (P₁)', required=False, initial=0.0)
+    P2 = forms.FloatField(label='Presión 2 (P₂)', required=False, initial=0.0)
+    z1 = forms.FloatField(label='Altura 1 (z₁)', required=False, initial=0.0)
+    z2 = forms.FloatField(label='Altura 2 (z₂)', required=False, initial=0.0)
 
     # --- VALIDACIÓN PERSONALIZADA ---
+    # Los campos de energía vacíos se limpian como 0.0 (cleaned_data nunca contiene None)
+    def clean_P1(self):
+        return self.cleaned_data['P1'] or 0.0
+
+    def clean_P2(self):
+        return self.cleaned_data['P2'] or 0.0
+
+    def clean_z1(self):
+        return self.cleaned_data['z1'] or 0.0
+
+    def clean_z2(self):
+        return self.cleaned_data['z2'] or 0.0
+
     def clean(self):
         cleaned_data = super().clean()
         input_type = cleaned_data.get('input_type')
         velocity = cleaned_data.get('velocity')
         caudal = cleaned_data.get('caudal')
 
-        # Validar entrada según tipo
-        if input_type == 'V' and (velocity is None or velocity <= 0):
-            self.add_error(
-                'velocity',
-                'Debe ingresar una Velocidad (V) positiva cuando selecciona esta opción.'
-            )
-
-        if input_type == 'Q' and (caudal is None or caudal <= 0):
-            self.add_error(
-                'caudal',
-                'Debe ingresar un Caudal (Q) positivo cuando selecciona esta opción.'
-            )
+        # Validar solo el campo seleccionado: `not (x and x > 0)` cubre None, 0 y negativos.
+        # El campo no seleccionado queda oculto en la plantilla y se ignora.
+        if input_type == 'V':
+            if not (velocity and velocity > 0):
+                self.add_error(
+                    'velocity',
+                    'Debe ingresar una Velocidad (V) positiva cuando selecciona esta opción.'
+                )
+        elif input_type == 'Q':
+            if not (caudal and caudal > 0):
+                self.add_error(
+                    'caudal',
+                    'Debe ingresar un Caudal (Q) positivo cuando selecciona esta opción.'
+                )
 
         return cleaned_data
@@ -1,3 +1,163 @@
-from django.test import TestCase
+import math
+import re
+from decimal import Decimal, localcontext
 
-# Create your tests here.
+import numpy as np
+from django.test import Client, SimpleTestCase
+
+from .data_tables import (
+    MINOR_LOSS_NAMES, ROUGHNESS_MATERIALS, get_pipe_diameter, get_pipe_diameter_batch, get_roughness_by_material,
+    get_roughness_by_material_batch, sum_minor_loss_k, sum_minor_loss_k_batch,
+)
+from .fluid_mechanics import (
+    _colebrook_friction_factor_array, colebrook_white_friction_factor, full_hydraulics, solve_velocity,
+)
+from .forms import FluidInputForm
+
+
+FORM_DATA = {
+    'system': 'SI', 'variable_to_solve': 'HL_DP_POWER', 'rho': 1000, 'mu': 0.001,
+    'input_type': 'V', 'velocity': 2.0, 'length': 100, 'nominal': 2, 'schedule': 40,
+    'material': 'acero comercial y soldado', 'pump_efficiency': 0.75, 'accessories_json': '{}',
+}
+
+
+class CalculatorViewTests(SimpleTestCase):
+    def test_each_new_visitor_gets_a_working_csrf_token(self):
+        # Cada visitante nuevo debe recibir su propia cookie CSRF (no una página en caché ajena)
+        for _ in range(2):
+            client = Client(enforce_csrf_checks=True)
+            response = client.get('/')
+            self.assertIn('csrftoken', response.cookies)
+
+            token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+            response = client.post('/', dict(FORM_DATA, csrfmiddlewaretoken=token))
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('error', response.context['results'])
+
+    def test_title_cased_accessories_add_minor_losses(self):
+        # El selector envía los nombres tal como se muestran ("Codo Corto 90°"), no en minúsculas
+        def head_loss(accessories_json):
+            response = self.client.post('/', dict(FORM_DATA, accessories_json=accessories_json))
+            return float(response.context['results']['HL'].split()[0])
+
+        added = head_loss('{"Codo Corto 90°": 2}') - head_loss('{}')
+        self.assertAlmostEqual(added, 2 * 0.90 * 2.0 ** 2 / (2 * 9.81), delta=0.01)
+
+
+class FluidInputFormTests(SimpleTestCase):
+    def test_unselected_flow_field_may_be_zero(self):
+        form = FluidInputForm(dict(FORM_DATA, input_type='Q', caudal=0.01, velocity=0))
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_selected_flow_field_must_be_positive(self):
+        form = FluidInputForm(dict(FORM_DATA, input_type='V', velocity=0, caudal=0))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['velocity'],
+            ['Debe ingresar una Velocidad (V) positiva cuando selecciona esta opción.'],
+        )
+
+
+class PipeDiameterTests(SimpleTestCase):
+    def test_only_exact_nominal_uses_the_table(self):
+        self.assertEqual(get_pipe_diameter(0.125, 40, 'SI'), 0.0068)
+        # Un diámetro en metros cercano a 1/8" se usa tal cual, no como el nominal de tabla
+        self.assertEqual(get_pipe_diameter(0.1254, 40, 'SI'), 0.1254)
+        self.assertEqual(get_pipe_diameter_batch([0.125, 0.1254], 40, 'SI').tolist(), [0.0068, 0.1254])
+
+
+class RoughnessBatchTests(SimpleTestCase):
+    def test_batch_matches_scalar_lookup(self):
+        indices = list(range(len(ROUGHNESS_MATERIALS)))
+        for system in ('SI', 'INGLES'):
+            with self.subTest(system=system):
+                expected = [get_roughness_by_material(material, system) for material in ROUGHNESS_MATERIALS]
+                self.assertEqual(get_roughness_by_material_batch(indices, system).tolist(), expected)
+
+    def test_out_of_range_indices_are_rejected(self):
+        for indices in ([-1], [0, len(ROUGHNESS_MATERIALS)]):
+            with self.subTest(indices=indices), self.assertRaises(ValueError):
+                get_roughness_by_material_batch(indices, 'SI')
+
+
+class MinorLossBatchTests(SimpleTestCase):
+    def test_batch_matches_scalar_sum(self):
+        counts = np.zeros((3, len(MINOR_LOSS_NAMES)))
+        counts[1, 0] = 2
+        counts[2, :] = np.arange(len(MINOR_LOSS_NAMES))
+        for row, total in zip(counts, sum_minor_loss_k_batch(counts).tolist()):
+            expected = sum_minor_loss_k({name: n for name, n in zip(MINOR_LOSS_NAMES, row.tolist()) if n})
+            self.assertAlmostEqual(total, expected, delta=1e-12)
+
+    def test_wrong_number_of_columns_is_rejected(self):
+        with self.assertRaises(ValueError):
+            sum_minor_loss_k_batch([1.0] * (len(MINOR_LOSS_NAMES) - 1))
+
+
+def colebrook_reference(Re, epsilon_D):
+    """Punto fijo de Colebrook-White iterado hasta converger con 40 dígitos (Decimal)."""
+    with localcontext() as ctx:
+        ctx.prec = 40
+        A = Decimal(epsilon_D) / Decimal('3.7')
+        B = Decimal('2.51') / Decimal(Re)
+        ln10 = Decimal(10).ln()
+        x = Decimal(8)
+        for _ in range(200):
+            x_new = -2 * (A + B * x).ln() / ln10
+            if abs(x_new - x) < Decimal('1e-35') * x:
+                break
+            x = x_new
+        return float(1 / (x_new * x_new))
+
+
+class ColebrookTests(SimpleTestCase):
+    RE_VALUES = np.logspace(math.log10(2e3), 9, 57)
+    EPSILON_D_VALUES = (0.0, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.05, 0.1, 0.5, 1.0)
+
+    def test_friction_factor_matches_converged_fixed_point(self):
+        for epsilon_D in self.EPSILON_D_VALUES:
+            f_array = _colebrook_friction_factor_array(self.RE_VALUES, epsilon_D)
+            for Re, f_vec in zip(self.RE_VALUES.tolist(), f_array.tolist()):
+                f_ref = colebrook_reference(Re, epsilon_D)
+                with self.subTest(Re=Re, epsilon_D=epsilon_D):
+                    self.assertLess(abs(colebrook_white_friction_factor(Re, epsilon_D) - f_ref), 1e-13 * f_ref)
+                    self.assertLess(abs(f_vec - f_ref), 1e-13 * f_ref)
+
+
+class SolveVelocityTests(SimpleTestCase):
+    # Tubería de 2" cédula 40 de acero comercial con agua (SI)
+    D = 0.0525
+    PIPE = dict(L=100.0, D=D, rho=1000.0, nu=1e-6, sum_K=2.0, g=9.81, epsilon_D=4.6e-5 / D)
+
+    def test_solution_balances_the_energy_equation(self):
+        V, Q, f, Re, hL = solve_velocity(100000.0, 0.0, 0.0, 0.0, **self.PIPE)
+
+        available_head = 100000.0 / (1000.0 * 9.81)
+        self.assertAlmostEqual(hL, available_head, delta=1e-7 * available_head)
+        self.assertAlmostEqual(Q, V * math.pi * self.D ** 2 / 4, delta=1e-15)
+        # f, Re y hL devueltos corresponden a la V resuelta
+        p = self.PIPE
+        hyd = full_hydraulics(V, p['D'], p['nu'], p['epsilon_D'], p['L'], p['sum_K'], p['g'], p['rho'], Q, 'SI')
+        self.assertEqual((f, Re, hL), (hyd['f'], hyd['Re'], hyd['hL']))
+
+    def test_no_sign_change_returns_none(self):
+        # z2 > z1 sin diferencia de presión: no hay energía disponible para ninguna V > 0
+        with self.assertWarns(UserWarning):
+            result = solve_velocity(0.0, 0.0, 0.0, 10.0, **self.PIPE)
+        self.assertEqual(result, (None, None, None, None, None))
+
+    def test_exact_root_at_v_max_is_returned(self):
+        # Desnivel igual a hL(V_max): F(V_max) es exactamente 0
+        p = self.PIPE
+        hL_max = full_hydraulics(20.0, p['D'], p['nu'], p['epsilon_D'], p['L'], p['sum_K'], p['g'], p['rho'],
+                                 0.0, 'SI')['hL']
+        V, Q, f, Re, hL = solve_velocity(0.0, 0.0, hL_max, 0.0, V_max=20.0, **self.PIPE)
+        self.assertEqual((V, hL), (20.0, hL_max))
+
+    def test_bracket_grows_past_v_max(self):
+        # Con 1000 m de desnivel en 10 m de tubería la solución está muy por encima de V_max = 20
+        V, Q, f, Re, hL = solve_velocity(0.0, 0.0, 1000.0, 0.0, L=10.0, D=0.05, rho=1000.0, nu=1e-6,
+                                         sum_K=0.0, g=9.81, epsilon_D=6e-5 / 0.05)
+        self.assertGreater(V, 20.0)
+        self.assertAlmostEqual(hL, 1000.0, delta=1e-6)
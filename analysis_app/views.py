@@ -1,19 +1,39 @@
 # analysis_app/views.py (CÓDIGO COMPLETO FINAL Y CONSOLIDADO)
 
-import numpy as np
+import functools
 import json
+import math
 from django.shortcuts import render
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson es opcional; json estándar produce el mismo resultado
+    _json_loads = json.loads
+
 from .forms import FluidInputForm 
 from .fluid_mechanics import (
-    colebrook_white_friction_factor, total_head_loss, reynolds_number, 
     generate_hl_vs_v_data, solve_velocity, get_constants, 
-    kinematic_viscosity, pressure_drop, pumping_power
+    kinematic_viscosity, full_hydraulics
 )
 from .data_tables import (
-    get_pipe_diameter, get_roughness_by_material, get_minor_loss_k, 
+    get_pipe_diameter, get_roughness_by_material, sum_minor_loss_k,
     get_accessories_dict
 )
 
+# Tabla estática de accesorios para el selector (se construye una sola vez)
+_ACCESSORIES = get_accessories_dict()
+
+
+@functools.lru_cache(maxsize=1024)
+def _pipe_geom(nominal: float, schedule: int, system: str, material: str):
+    """Devuelve (D, Area, epsilon_D) para una combinación de tubería y material."""
+    D = get_pipe_diameter(nominal, schedule, system)
+    Area = math.pi * D * D * 0.25
+    epsilon = get_roughness_by_material(material, system)
+    return D, Area, epsilon / D if D else 0.0
+
+
 def calculate_fluid_flow(request):
     """
     Gestiona la entrada del formulario, realiza los cálculos de mecánica de fluidos
@@ -43,22 +63,20 @@ def calculate_fluid_flow(request):
             rho = data['rho']; mu = data['mu']; L = data['length']; nominal = data['nominal']; schedule = data['schedule']
             material = data['material']; solve_for = data['variable_to_solve']; input_type = data['input_type']
             pump_efficiency = data['pump_efficiency']
-            P1, P2 = data['P1'] or 0, data['P2'] or 0; z1, z2 = data['z1'] or 0, data['z2'] or 0
+            P1, P2, z1, z2 = data['P1'], data['P2'], data['z1'], data['z2'] # el formulario ya da 0.0 si están vacíos
             
             nu = kinematic_viscosity(mu, rho)
             
             # 2. PROCESAMIENTO DE ACCESORIOS (JSON del HTML)
             accessories_json_str = request.POST.get('accessories_json', '{}')
-            accessories_dict = json.loads(accessories_json_str)
+            # Se normalizan las claves una sola vez al parsear (la tabla de K está en minúsculas)
+            accessories_dict = {k.lower().strip(): v for k, v in _json_loads(accessories_json_str).items()}
 
-            sum_K = 0
-            for component_name, count in accessories_dict.items():
-                sum_K += get_minor_loss_k(component_name.lower()) * count # Multiplicamos por la cantidad
+            sum_K = sum_minor_loss_k(accessories_dict) # K de cada accesorio por su cantidad
             
             # 3. CÁLCULOS GEOMÉTRICOS Y FÍSICOS
-            D = get_pipe_diameter(nominal, schedule, system); Area = np.pi * (D**2) / 4
+            D, Area, epsilon_D = _pipe_geom(nominal, schedule, system, material)
             if Area <= 0: raise ValueError("El diámetro interno es cero o negativo.")
-            epsilon = get_roughness_by_material(material, system)
             
             # 4. DETERMINAR V y Q DE ENTRADA
             # Aquí V y Q se reasignan a los valores del formulario
@@ -71,14 +89,14 @@ def calculate_fluid_flow(request):
 
             # 5. DESPACHO DE CÁLCULO
             if solve_for == 'V':
-                V_solved, Q_solved = solve_velocity(P1, P2, z1, z2, L, D, rho, nu, sum_K, g, epsilon)
+                V_solved, Q_solved, f, Re, hL = solve_velocity(P1, P2, z1, z2, L, D, rho, nu, sum_K, g, epsilon_D)
                 
                 if V_solved is not None:
-                    V, Q = V_solved, Q_solved # Usamos valores resueltos
+                    V, Q = V_solved, Q_solved # Usamos valores resueltos (f, Re y hL ya vienen del solver)
                     
-                    Re = reynolds_number(V, D, nu); epsilon_D = epsilon / D
-                    f = colebrook_white_friction_factor(Re, epsilon_D); hL = total_head_loss(f, L, D, V, sum_K, g)
-                    delta_P = pressure_drop(rho, g, hL); power = pumping_power(Q, delta_P, system, pump_efficiency)
+                    # Equivalente en línea de pressure_drop() y pumping_power() (W en SI, hp en Inglés)
+                    delta_P = rho * g * hL
+                    power = Q * delta_P / pump_efficiency if system == 'SI' else Q * delta_P / 550.0 / pump_efficiency
                     
                     results = {
                         'variable_solved': f'Velocidad y Caudal (Resuelto)', 'V': f"{V:.3f} {units['velocity']}", 'Q': f"{Q:.4f} {units['caudal']}",
@@ -89,9 +107,8 @@ def calculate_fluid_flow(request):
                     results = {'error': 'El cálculo de V/Q no convergió. Revise si la energía disponible es suficiente.'}
                     
             else: # HL_DP_POWER (Cálculo con V o Q de entrada)
-                Re = reynolds_number(V, D, nu); epsilon_D = epsilon / D
-                f = colebrook_white_friction_factor(Re, epsilon_D); hL = total_head_loss(f, L, D, V, sum_K, g)
-                delta_P = pressure_drop(rho, g, hL); power = pumping_power(Q, delta_P, system, pump_efficiency)
+                hyd = full_hydraulics(V, D, nu, epsilon_D, L, sum_K, g, rho, Q, system, pump_efficiency)
+                Re, f, hL, delta_P, power = hyd['Re'], hyd['f'], hyd['hL'], hyd['delta_P'], hyd['power']
                 
                 results = {
                     'variable_solved': 'Pérdida de Carga, Presión y Potencia', 'V': f"{V:.3f} {units['velocity']}", 'Q': f"{Q:.4f} {units['caudal']}",
@@ -102,7 +119,7 @@ def calculate_fluid_flow(request):
             # 6. GENERAR DATOS PARA LA GRÁFICA
             # V y Q siempre tienen un valor aquí, ya sea del input o resuelto.
             V_min, V_max, steps = (0.5, 5.0, 20) if system == 'SI' else (1.0, 15.0, 20)
-            chart_raw_data = generate_hl_vs_v_data(V_min, V_max, steps, L, D, nu, sum_K, g, epsilon)
+            chart_raw_data = generate_hl_vs_v_data(V_min, V_max, steps, L, D, nu, sum_K, g, epsilon_D)
             
             chart_data_struct = {
                 'labels': [f"{v:.2f}" for v, hl in chart_raw_data],
@@ -120,6 +137,6 @@ def calculate_fluid_flow(request):
         'results': results,
         'units': units,
         'chart': chart_data_struct, 
-        'accessories': get_accessories_dict(), 
+        'accessories': _ACCESSORIES,
     }
     return render(request, 'analysis_app/calculator.html', context)
\ No newline at end of file